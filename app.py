@@ -1,23 +1,135 @@
 import os
+import re
+import json
+import collections
+import contextlib
 import tempfile
-import glob
-from flask import Flask, request, jsonify
+import subprocess
+import threading
+import time
+import uuid
+import certifi
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+import requests
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from flask import Flask, Response, request, jsonify, stream_with_context
 from google.cloud import storage
+from google.cloud.exceptions import NotFound
+from google.cloud.storage.retry import DEFAULT_RETRY
 import yt_dlp
+from yt_dlp.extractor.youtube import YoutubeIE
 
 app = Flask(__name__)
 
+# Verify TLS against certifi's CA bundle
+os.environ.setdefault('SSL_CERT_FILE', certifi.where())
+
 BUCKET_NAME = os.environ.get('BUCKET_NAME')
 PROXY_URL = os.environ.get('PROXY_URL')
 POT_PROVIDER_URL = os.environ.get('POT_PROVIDER_URL', 'http://127.0.0.1:4416')
 COOKIES_FILE = os.environ.get('COOKIES_FILE', 'cookies.txt')
+TARGET_CODEC = os.environ.get('TARGET_CODEC', 'mp3')
+LARGE_UPLOAD_THRESHOLD = 64 * 1024 * 1024
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '4'))
+STORAGE_POOL_SIZE = int(os.environ.get('STORAGE_POOL_SIZE', '16'))
+YDL_POOL_SIZE = int(os.environ.get('YDL_POOL_SIZE', '4'))
+YDL_POOL_KEYS = 4
+INFO_CACHE_TTL = int(os.environ.get('INFO_CACHE_TTL', '3600'))
+YTDLP_VERBOSE = bool(int(os.environ.get('YTDLP_VERBOSE', '0')))
+JOB_CONCURRENCY = int(os.environ.get('JOB_CONCURRENCY', '4'))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', '3600'))
+COOKIES_TTL = int(os.environ.get('COOKIES_TTL', '300'))
+LIST_MAX_RESULTS = 1000
+BATCH_MAX = int(os.environ.get('BATCH_MAX', '32'))
+LIST_FIELDS = 'items(name,size,timeCreated,metadata),nextPageToken'
+
+MAX_URL_LENGTH = 2048
+_URL_RE = re.compile(r'^https?://[^\s]{5,%d}$' % MAX_URL_LENGTH)
+_JOB_ID_RE = re.compile(r'[0-9a-f]{32}')
+
+# Largest body a valid /batch can need: every URL at full length with each
+# character outside the BMP JSON-escaped as a \uXXXX\uXXXX surrogate pair
+# (12 bytes), plus slack for quotes, separators, whitespace and keys
+app.config['MAX_CONTENT_LENGTH'] = BATCH_MAX * (12 * (len('https://') + MAX_URL_LENGTH) + 64) + 1024
 
 # Global cookies path
 COOKIES_PATH = None
+COOKIES_TMP_PATH = '/tmp/cookies.txt'
+
+# When cookies were last fetched from GCS (time.monotonic())
+_COOKIES_STATE = {'fetched_at': None}
+_COOKIES_LOCK = threading.Lock()
+
+# Shared storage client, created lazily on first use
+_STORAGE_CLIENT = None
+_STORAGE_LOCK = threading.Lock()
+
+# Idle YoutubeDL instances for metadata extraction, keyed by frozen options
+_YDL_POOLS = collections.OrderedDict()
+_YDL_POOLS_LOCK = threading.Lock()
+
+# Trimmed /info responses keyed by video ID
+_INFO_CACHE = TTLCache(maxsize=10_000, ttl=INFO_CACHE_TTL)
+_INFO_CACHE_LOCK = threading.Lock()
+
+# Background /download jobs; records live in GCS under jobs/, and only
+# in-flight jobs are tracked here (video key -> job ID)
+_JOB_EXECUTOR = ThreadPoolExecutor(max_workers=JOB_CONCURRENCY)
+_INFLIGHT_JOBS = {}
+_JOBS_LOCK = threading.Lock()
+
+# Static response bodies, serialized once at import time
+_INDEX_BYTES = json.dumps({
+    'service': 'asr-worker',
+    'endpoints': {
+        'POST /download': 'Queue an audio download for {"url": ...}; returns a job',
+        'GET /jobs/<job_id>': 'Status and result of a queued download',
+        'POST /batch': 'Download audio for {"urls": [...]} in parallel',
+        'POST /info': 'Video metadata for {"url": ...}',
+        'POST /formats': 'Available formats for {"url": ...}',
+        'GET /list': 'List uploaded audio files as NDJSON (?limit=&page_token=)',
+        'POST /refresh-cookies': 'Re-fetch the cookies file from GCS',
+        'GET /health': 'Health check',
+    }
+}).encode()
+
+_HEALTH_BYTES = {
+    cookies_available: json.dumps({
+        'status': 'healthy',
+        'bucket_configured': bool(BUCKET_NAME),
+        'proxy_configured': bool(PROXY_URL),
+        'cookies_available': cookies_available
+    }).encode()
+    for cookies_available in (False, True)
+}
+
+
+def _build_storage_client():
+    """Create a storage client whose HTTP pool fits the expected concurrency"""
+    credentials, project = google.auth.default(scopes=storage.Client.SCOPE)
+    session = AuthorizedSession(credentials)
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=STORAGE_POOL_SIZE)
+    session.mount('https://', adapter)
+    return storage.Client(project=project, credentials=credentials, _http=session)
 
 
 def get_storage_client():
-    return storage.Client()
+    """Return the shared storage client so connections are reused across requests"""
+    global _STORAGE_CLIENT
+
+    with _STORAGE_LOCK:
+        if _STORAGE_CLIENT is None:
+            _STORAGE_CLIENT = _build_storage_client()
+        return _STORAGE_CLIENT
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
 
 
 def download_cookies():
@@ -27,41 +139,62 @@ def download_cookies():
     if not BUCKET_NAME:
         return None
 
-    try:
-        storage_client = get_storage_client()
-        bucket = storage_client.bucket(BUCKET_NAME)
-        blob = bucket.blob(COOKIES_FILE)
+    with _COOKIES_LOCK:
+        _COOKIES_STATE['fetched_at'] = time.monotonic()
+
+        # download_to_filename truncates its target before the GET, so
+        # download beside the live file and swap it in on success
+        partial_path = f'{COOKIES_TMP_PATH}.part'
 
-        if blob.exists():
-            COOKIES_PATH = '/tmp/cookies.txt'
-            blob.download_to_filename(COOKIES_PATH)
+        try:
+            storage_client = get_storage_client()
+            bucket = storage_client.bucket(BUCKET_NAME)
+            blob = bucket.blob(COOKIES_FILE)
+
+            # A single GET; a missing object raises NotFound
+            blob.download_to_filename(partial_path)
+            os.replace(partial_path, COOKIES_TMP_PATH)
+            COOKIES_PATH = COOKIES_TMP_PATH
             print(f"Downloaded cookies from gs://{BUCKET_NAME}/{COOKIES_FILE}")
             return COOKIES_PATH
-        else:
+        except NotFound:
+            # Cookies were removed upstream; fall back to the POT provider
+            _remove_file(COOKIES_TMP_PATH)
+            COOKIES_PATH = None
             print(f"No cookies file found at gs://{BUCKET_NAME}/{COOKIES_FILE}")
             return None
-    except Exception as e:
-        print(f"Error downloading cookies: {e}")
-        return None
+        except Exception as e:
+            print(f"Error downloading cookies: {e}")
+            return None
+        finally:
+            _remove_file(partial_path)
 
 
 def get_ydl_opts(tmpdir=None):
     """Get yt-dlp options (cookies-first, POT fallback)"""
     global COOKIES_PATH
 
-    # Always ensure cookies exist (Cloud Run safe)
+    # Re-fetch cookies if /tmp was wiped (Cloud Run safe), but hit GCS
+    # at most once per COOKIES_TTL while they stay missing
     if not COOKIES_PATH or not os.path.exists(COOKIES_PATH):
-        download_cookies()
+        fetched_at = _COOKIES_STATE['fetched_at']
+        if fetched_at is None or time.monotonic() - fetched_at > COOKIES_TTL:
+            download_cookies()
 
     opts = {
-        'retries': 5,
+        'retries': 10,
         'fragment_retries': 5,
         'socket_timeout': 60,
-        'extractor_retries': 3,
+        'extractor_retries': 5,
+        'throttled_rate': 100_000,
+        'concurrent_fragment_downloads': int(os.environ.get('YTDLP_CONCURRENT_FRAGMENTS', '4')),
+        'http_chunk_size': 10485760,
         'noplaylist': True,
-        'verbose': True,
+        'verbose': YTDLP_VERBOSE,
+        'quiet': not YTDLP_VERBOSE,
+        'no_warnings': not YTDLP_VERBOSE,
+        'noprogress': True,
         'geo_bypass': True,
-        'nocheckcertificate': True,
         'http_headers': {
             'User-Agent': (
                 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
@@ -97,88 +230,590 @@ def get_ydl_opts(tmpdir=None):
     return opts
 
 
+def is_valid_url(url):
+    """Cheap shape check to reject junk before it reaches yt-dlp"""
+    return isinstance(url, str) and _URL_RE.fullmatch(url) is not None
+
+
+def canonical_video_key(video_url):
+    """Map equivalent YouTube URLs to the video ID (regex only, no network)"""
+    if YoutubeIE.suitable(video_url):
+        return YoutubeIE._match_id(video_url)
+    return video_url
+
+
+class _YdlPool:
+    """Idle YoutubeDL instances sharing one option set"""
+
+    def __init__(self):
+        self.idle = []
+        self.closed = False
+
+
+def _close_ydls(ydls):
+    for ydl in ydls:
+        # close() writes the instance's cookie jar back to cookiefile, which
+        # may since have been refreshed or deleted; discard it instead
+        ydl.params['cookiefile'] = None
+        try:
+            ydl.close()
+        except Exception as e:
+            print(f"Error closing YoutubeDL: {e}")
+
+
+def clear_ydl_pools():
+    """Close all idle YoutubeDL instances; busy ones are closed on release"""
+    with _YDL_POOLS_LOCK:
+        pools = list(_YDL_POOLS.values())
+        _YDL_POOLS.clear()
+        idle = []
+        for pool in pools:
+            pool.closed = True
+            idle.extend(pool.idle)
+            pool.idle.clear()
+
+    _close_ydls(idle)
+
+
+@contextlib.contextmanager
+def _borrow_ydl(opts):
+    """Borrow a YoutubeDL for opts, reusing an idle one when available"""
+    opts_key = json.dumps(opts, sort_keys=True)
+    evicted = []
+
+    with _YDL_POOLS_LOCK:
+        pool = _YDL_POOLS.get(opts_key)
+        if pool is None:
+            pool = _YDL_POOLS[opts_key] = _YdlPool()
+            while len(_YDL_POOLS) > YDL_POOL_KEYS:
+                _, old = _YDL_POOLS.popitem(last=False)
+                old.closed = True
+                evicted.extend(old.idle)
+                old.idle.clear()
+        else:
+            _YDL_POOLS.move_to_end(opts_key)
+        ydl = pool.idle.pop() if pool.idle else None
+
+    _close_ydls(evicted)
+
+    if ydl is None:
+        ydl = yt_dlp.YoutubeDL(json.loads(opts_key))
+
+    try:
+        yield ydl
+    finally:
+        with _YDL_POOLS_LOCK:
+            keep = not pool.closed and len(pool.idle) < YDL_POOL_SIZE
+            if keep:
+                pool.idle.append(ydl)
+        if not keep:
+            _close_ydls([ydl])
+
+
+def extract_metadata(video_url, minimal=False):
+    """Extract video metadata without downloading, on a pooled YoutubeDL"""
+    opts = get_ydl_opts()
+    opts['skip_download'] = True
+
+    if minimal:
+        # Skip the DASH/HLS manifest fetches; only formats need them
+        opts['extractor_args']['youtube']['skip'] = ['dash', 'hls']
+
+    # Each concurrent extraction gets its own instance
+    with _borrow_ydl(opts) as ydl:
+        return ydl.extract_info(video_url, download=False)
+
+
+class _PipeReader:
+    """Forward-only reader over a pipe whose tell() counts bytes consumed
+
+    Resumable uploads call tell() to track their offset, which raises
+    ESPIPE on a raw pipe.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._position = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            data = self._stream.read()
+        else:
+            # Short reads would be taken as end of stream
+            chunks = []
+            remaining = size
+            while remaining > 0:
+                chunk = self._stream.read(remaining)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            data = b''.join(chunks)
+
+        self._position += len(data)
+        return data
+
+    def tell(self):
+        return self._position
+
+
+def transcode_and_upload(source_file, blob):
+    """Transcode to mp3 with ffmpeg and stream its stdout straight to GCS"""
+    proc = subprocess.Popen(
+        ['ffmpeg', '-loglevel', 'error', '-i', source_file,
+         '-vn', '-f', 'mp3', '-b:a', '192k', 'pipe:1'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+    )
+
+    try:
+        blob.upload_from_file(_PipeReader(proc.stdout), content_type='audio/mpeg',
+                              retry=DEFAULT_RETRY)
+    except Exception:
+        proc.kill()
+        raise
+    finally:
+        proc.stdout.close()
+        proc.wait()
+
+    if proc.returncode != 0:
+        blob.delete()
+        raise RuntimeError('Audio extraction failed')
+
+
+def _parse_duration(value):
+    """Whole seconds from a yt-dlp or stored metadata duration, 0 if unknown"""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError, OverflowError):
+        return 0
+
+
+def find_existing_audio(video_url):
+    """Return the stored result for an already uploaded video, or None"""
+    if not YoutubeIE.suitable(video_url):
+        return None
+
+    video_id = YoutubeIE._match_id(video_url)
+    exts = ('m4a', 'mp3') if TARGET_CODEC == 'copy' else ('mp3',)
+
+    storage_client = get_storage_client()
+    bucket = storage_client.bucket(BUCKET_NAME)
+
+    for ext in exts:
+        blob = bucket.blob(f'audio/{video_id}.{ext}')
+        try:
+            # One metadata GET; a missing object raises NotFound
+            blob.reload()
+        except NotFound:
+            continue
+
+        metadata = blob.metadata or {}
+        return {
+            'success': True,
+            'cached': True,
+            'video_id': video_id,
+            'title': metadata.get('title', video_id),
+            'channel': metadata.get('channel', 'Unknown'),
+            'duration_seconds': _parse_duration(metadata.get('duration')),
+            'file_size_bytes': blob.size,
+            'gcs_path': f'gs://{BUCKET_NAME}/{blob.name}',
+            'url': f'https://storage.googleapis.com/{BUCKET_NAME}/{blob.name}'
+        }
+
+    return None
+
+
+def _download_one(video_url, check_existing=True):
+    """Download a single URL as audio, upload it to GCS and return its metadata"""
+    if check_existing:
+        existing = find_existing_audio(video_url)
+        if existing:
+            return existing
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ydl_opts = get_ydl_opts(tmpdir)
+        ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best'
+        if TARGET_CODEC == 'copy':
+            ydl_opts['format_sort'] = ['acodec:m4a']
+
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(video_url, download=True)
+
+        video_id = info['id']
+        title = info.get('title', video_id)
+        # Live streams and premieres report no duration
+        duration = _parse_duration(info.get('duration'))
+        channel = info.get('channel', 'Unknown')
+
+        downloads = info.get('requested_downloads') or []
+        source_file = next((d['filepath'] for d in downloads if d.get('filepath')), None)
+        if not source_file:
+            source_file = next((e.path for e in os.scandir(tmpdir)
+                                if e.name.startswith(f'{video_id}.')), None)
+
+        if not source_file:
+            raise RuntimeError('Audio extraction failed')
+
+        source_size = os.path.getsize(source_file)
+
+        # m4a sources can be stored as-is, skipping the ffmpeg re-encode
+        copy_source = TARGET_CODEC == 'copy' and source_file.endswith('.m4a')
+        ext = 'm4a' if copy_source else 'mp3'
+
+        storage_client = get_storage_client()
+        bucket = storage_client.bucket(BUCKET_NAME)
+        blob = bucket.blob(f'audio/{video_id}.{ext}')
+
+        blob.metadata = {
+            'title': title,
+            'channel': channel,
+            'duration': str(duration),
+            'source_url': video_url
+        }
+
+        # Uploads of unknown size always go resumable (a known size under
+        # 8 MiB would go single-shot multipart); with retry=DEFAULT_RETRY a
+        # transient failure retries the current chunk, not the whole file
+        if source_size > LARGE_UPLOAD_THRESHOLD:
+            blob.chunk_size = 32 * 1024 * 1024
+        else:
+            blob.chunk_size = 8 * 1024 * 1024
+
+        if copy_source:
+            with open(source_file, 'rb') as f:
+                blob.upload_from_file(f, content_type='audio/mp4', retry=DEFAULT_RETRY)
+            file_size = source_size
+        else:
+            transcode_and_upload(source_file, blob)
+            file_size = blob.size
+
+        return {
+            'success': True,
+            'video_id': video_id,
+            'title': title,
+            'channel': channel,
+            'duration_seconds': duration,
+            'file_size_bytes': file_size,
+            'gcs_path': f'gs://{BUCKET_NAME}/{blob.name}',
+            'url': f'https://storage.googleapis.com/{BUCKET_NAME}/{blob.name}'
+        }
+
+
+def _job_blob(job_id):
+    storage_client = get_storage_client()
+    return storage_client.bucket(BUCKET_NAME).blob(f'jobs/{job_id}.json')
+
+
+def save_job(job_id, record):
+    """Store a job record in GCS so any instance can answer /jobs polls"""
+    record = {**record, 'updated_at': time.time()}
+
+    # Overwriting a job record is idempotent, so it is safe to retry
+    _job_blob(job_id).upload_from_string(
+        json.dumps(record), content_type='application/json', retry=DEFAULT_RETRY)
+
+
+def load_job(job_id):
+    """Return a stored job record, or None if there is none"""
+    try:
+        return json.loads(_job_blob(job_id).download_as_bytes())
+    except NotFound:
+        return None
+
+
+def _run_job(job_id, video_url, job_key):
+    """Run a queued /download and record its progress and result in GCS"""
+    try:
+        try:
+            save_job(job_id, {'job_id': job_id, 'status': 'running', 'url': video_url})
+        except Exception as e:
+            print(f"Error saving job {job_id}: {e}")
+
+        result = _download_one_safe(video_url, check_existing=False)
+        status = 'done' if result.get('success') else 'failed'
+
+        try:
+            save_job(job_id, {'job_id': job_id, 'status': status, **result})
+        except Exception as e:
+            print(f"Error saving job {job_id}: {e}")
+            # Leave the record in a final state rather than 'running'
+            try:
+                save_job(job_id, {
+                    'job_id': job_id,
+                    'status': 'failed',
+                    'success': False,
+                    'url': video_url,
+                    'error': f'Could not save job result: {str(e)}'
+                })
+            except Exception as e:
+                print(f"Error saving job {job_id}: {e}")
+    finally:
+        with _JOBS_LOCK:
+            _INFLIGHT_JOBS.pop(job_key, None)
+
+
+def _download_one_safe(video_url, check_existing=True):
+    """Like _download_one, but reports failures in the result dict"""
+    try:
+        return _download_one(video_url, check_existing)
+    except yt_dlp.utils.DownloadError as e:
+        return {'success': False, 'url': video_url, 'error': f'Download failed: {str(e)}'}
+    except Exception as e:
+        return {'success': False, 'url': video_url, 'error': str(e)}
+
+
 @app.route('/download', methods=['POST'])
 def download_audio():
-    data = request.json
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
     video_url = data.get('url')
 
     if not video_url:
         return jsonify({'error': 'No URL provided'}), 400
 
+    if not is_valid_url(video_url):
+        return jsonify({'error': 'Invalid URL'}), 400
+
     if not BUCKET_NAME:
         return jsonify({'error': 'BUCKET_NAME not configured'}), 500
 
     try:
-        with tempfile.TemporaryDirectory() as tmpdir:
-            ydl_opts = get_ydl_opts(tmpdir)
-            ydl_opts['format'] = 'bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best'
-            ydl_opts['postprocessors'] = [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }]
+        existing = find_existing_audio(video_url)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(video_url, download=True)
+    if existing:
+        return jsonify(existing)
+
+    # Downloads take minutes; run them off the request thread, sharing
+    # one job per video while it is in flight on this instance
+    job_key = canonical_video_key(video_url)
+    with _JOBS_LOCK:
+        job_id = _INFLIGHT_JOBS.get(job_key)
+        is_new = job_id is None
+        if is_new:
+            job_id = uuid.uuid4().hex
+            _INFLIGHT_JOBS[job_key] = job_id
+
+    if is_new:
+        try:
+            save_job(job_id, {'job_id': job_id, 'status': 'pending', 'url': video_url})
+        except Exception as e:
+            with _JOBS_LOCK:
+                _INFLIGHT_JOBS.pop(job_key, None)
+            return jsonify({'error': str(e)}), 500
+
+        _JOB_EXECUTOR.submit(_run_job, job_id, video_url, job_key)
 
-            video_id = info['id']
-            title = info.get('title', video_id)
-            duration = info.get('duration', 0)
-            channel = info.get('channel', 'Unknown')
+    return jsonify({
+        'success': True,
+        'job_id': job_id,
+        'status': 'pending',
+        'status_url': f'/jobs/{job_id}'
+    }), 202
 
-            audio_files = glob.glob(f'{tmpdir}/{video_id}.mp3') or glob.glob(f'{tmpdir}/*.mp3')
 
-            if not audio_files:
-                return jsonify({'error': 'Audio extraction failed'}), 500
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    if not _JOB_ID_RE.fullmatch(job_id):
+        return jsonify({'error': 'Job not found'}), 404
 
-            audio_file = audio_files[0]
-            file_size = os.path.getsize(audio_file)
+    try:
+        job = load_job(job_id)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-            storage_client = get_storage_client()
-            bucket = storage_client.bucket(BUCKET_NAME)
-            blob = bucket.blob(f'audio/{video_id}.mp3')
-
-            blob.metadata = {
-                'title': title,
-                'channel': channel,
-                'duration': str(duration),
-                'source_url': video_url
-            }
-
-            blob.upload_from_filename(audio_file, content_type='audio/mpeg')
-
-            return jsonify({
-                'success': True,
-                'video_id': video_id,
-                'title': title,
-                'channel': channel,
-                'duration_seconds': duration,
-                'file_size_bytes': file_size,
-                'gcs_path': f'gs://{BUCKET_NAME}/audio/{video_id}.mp3',
-                'url': f'https://storage.googleapis.com/{BUCKET_NAME}/audio/{video_id}.mp3'
-            })
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    if job['status'] in ('pending', 'running'):
+        # A job whose instance died, or whose final write failed, stops
+        # being updated; report it as failed instead of polling forever
+        if time.time() - job.get('updated_at', 0) > JOB_STALE_AFTER:
+            return jsonify({**job, 'status': 'failed', 'success': False,
+                            'error': 'Job stopped reporting progress'})
+        return jsonify(job), 202
+    return jsonify(job)
+
+
+@app.route('/batch', methods=['POST'])
+def batch_download():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    urls = data.get('urls')
+
+    if not urls or not isinstance(urls, list):
+        return jsonify({'error': 'No URLs provided'}), 400
+
+    if len(urls) > BATCH_MAX:
+        return jsonify({'error': f'At most {BATCH_MAX} URLs per batch'}), 400
+
+    invalid = [u for u in urls if not is_valid_url(u)]
+    if invalid:
+        return jsonify({'error': 'Invalid URL', 'invalid_urls': invalid}), 400
+
+    if not BUCKET_NAME:
+        return jsonify({'error': 'BUCKET_NAME not configured'}), 500
+
+    # Each worker gets its own tmpdir and YoutubeDL instance
+    with ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY) as ex:
+        results = list(ex.map(_download_one_safe, urls))
+
+    return jsonify({
+        'success': all(r.get('success') for r in results),
+        'results': results
+    })
+
+
+@app.route('/info', methods=['POST'])
+def get_video_info():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    video_url = data.get('url')
+
+    if not video_url:
+        return jsonify({'error': 'No URL provided'}), 400
+
+    if not is_valid_url(video_url):
+        return jsonify({'error': 'Invalid URL'}), 400
+
+    cache_key = canonical_video_key(video_url)
+    with _INFO_CACHE_LOCK:
+        cached = _INFO_CACHE.get(cache_key)
+    if cached is not None:
+        return jsonify(cached)
+
+    try:
+        info = extract_metadata(video_url, minimal=True)
+
+        result = {
+            'success': True,
+            'video_id': info['id'],
+            'title': info.get('title'),
+            'channel': info.get('channel', 'Unknown'),
+            'duration_seconds': info.get('duration', 0),
+            'thumbnail': info.get('thumbnail'),
+            'upload_date': info.get('upload_date'),
+            'view_count': info.get('view_count')
+        }
+
+        with _INFO_CACHE_LOCK:
+            _INFO_CACHE[cache_key] = result
+
+        return jsonify(result)
+
+    except yt_dlp.utils.DownloadError as e:
+        return jsonify({'error': f'Extraction failed: {str(e)}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/formats', methods=['POST'])
+def list_formats():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    video_url = data.get('url')
+
+    if not video_url:
+        return jsonify({'error': 'No URL provided'}), 400
+
+    if not is_valid_url(video_url):
+        return jsonify({'error': 'Invalid URL'}), 400
+
+    try:
+        info = extract_metadata(video_url)
+
+        formats = [{
+            'format_id': f.get('format_id'),
+            'ext': f.get('ext'),
+            'acodec': f.get('acodec'),
+            'vcodec': f.get('vcodec'),
+            'abr': f.get('abr'),
+            'filesize': f.get('filesize') or f.get('filesize_approx')
+        } for f in info.get('formats') or []]
+
+        return jsonify({'success': True, 'video_id': info['id'], 'formats': formats})
 
     except yt_dlp.utils.DownloadError as e:
-        return jsonify({'error': f'Download failed: {str(e)}'}), 400
+        return jsonify({'error': f'Extraction failed: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _blob_to_dict(blob):
+    metadata = blob.metadata or {}
+    return {
+        'video_id': os.path.splitext(os.path.basename(blob.name))[0],
+        'title': metadata.get('title'),
+        'channel': metadata.get('channel'),
+        'duration_seconds': metadata.get('duration'),
+        'file_size_bytes': blob.size,
+        'created': blob.time_created.isoformat() if blob.time_created else None,
+        'gcs_path': f'gs://{BUCKET_NAME}/{blob.name}',
+        'url': f'https://storage.googleapis.com/{BUCKET_NAME}/{blob.name}'
+    }
+
+
+@app.route('/list', methods=['GET'])
+def list_audio_files():
+    if not BUCKET_NAME:
+        return jsonify({'error': 'BUCKET_NAME not configured'}), 500
+
+    try:
+        limit = int(request.args.get('limit', LIST_MAX_RESULTS))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, LIST_MAX_RESULTS))
+    page_token = request.args.get('page_token')
+
+    try:
+        storage_client = get_storage_client()
+        bucket = storage_client.bucket(BUCKET_NAME)
+
+        # Public URLs need no per-blob signing, so this is a single listing RPC
+        blobs = bucket.list_blobs(prefix='audio/', max_results=limit,
+                                  page_token=page_token, fields=LIST_FIELDS)
+        page = next(blobs.pages)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        for blob in page:
+            yield json.dumps(_blob_to_dict(blob)) + '\n'
+
+    headers = {}
+    if blobs.next_page_token:
+        headers['X-Next-Page-Token'] = blobs.next_page_token
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/x-ndjson', headers=headers)
+
+
 @app.route('/refresh-cookies', methods=['POST'])
 def refresh_cookies():
     if download_cookies():
+        # Pooled YoutubeDL instances hold the old cookie jar
+        clear_ydl_pools()
         return jsonify({'success': True, 'message': 'Cookies refreshed'})
     return jsonify({'success': False, 'message': 'No cookies file found'}), 404
 
 
+@app.route('/', methods=['GET'])
+def index():
+    return Response(_INDEX_BYTES, mimetype='application/json',
+                    headers={'Cache-Control': 'public, max-age=3600'})
+
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({
-        'status': 'healthy',
-        'bucket_configured': bool(BUCKET_NAME),
-        'proxy_configured': bool(PROXY_URL),
-        'cookies_available': bool(COOKIES_PATH and os.path.exists(COOKIES_PATH))
-    })
+    cookies_available = bool(COOKIES_PATH and os.path.exists(COOKIES_PATH))
+    return Response(_HEALTH_BYTES[cookies_available], mimetype='application/json')
 
 
 if __name__ == '__main__':
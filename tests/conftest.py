@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+import pytest
+import requests
+from google.auth.credentials import AnonymousCredentials
+from google.cloud import storage
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeGCSSession(requests.Session):
+    """Minimal resumable-upload endpoint; fail_puts lists PUTs to answer with 503"""
+
+    is_mtls = False
+
+    def __init__(self, fail_puts=()):
+        super().__init__()
+        self.received = bytearray()
+        self.calls = []
+        self.fail_puts = set(fail_puts)
+        self._puts = 0
+
+    def _response(self, method, url, status, body=b'', headers=None):
+        response = requests.Response()
+        response.request = requests.Request(method, url).prepare()
+        response.status_code = status
+        response.headers.update(headers or {})
+        response._content = body
+        return response
+
+    def request(self, method, url, data=None, headers=None, **kwargs):
+        self.calls.append(method)
+
+        if method == 'POST' and 'uploadType=resumable' in url:
+            return self._response(method, url, 200, headers={'location': 'https://upload/session'})
+
+        if method == 'PUT':
+            self._puts += 1
+            if self._puts in self.fail_puts:
+                return self._response(method, url, 503)
+
+            self.received.extend(data)
+            if headers['content-range'].endswith('/*'):
+                return self._response(method, url, 308,
+                                      headers={'range': f'bytes=0-{len(self.received) - 1}'})
+            body = json.dumps({'name': 'audio/x.mp3', 'bucket': 'b',
+                               'size': str(len(self.received))}).encode()
+            return self._response(method, url, 200, body=body)
+
+        if method == 'DELETE':
+            return self._response(method, url, 204)
+
+        raise AssertionError(f'Unexpected request: {method} {url}')
+
+
+def make_gcs_client(session):
+    return storage.Client(project='test', credentials=AnonymousCredentials(), _http=session)
+
+
+@pytest.fixture
+def gcs_session():
+    return FakeGCSSession()
+
+
+@pytest.fixture
+def gcs_client(gcs_session):
+    return make_gcs_client(gcs_session)
@@ -0,0 +1,213 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import app
+
+from conftest import FakeGCSSession, make_gcs_client
+
+
+def _fake_ffmpeg(num_bytes, exit_code=0):
+    """Popen replacement that writes num_bytes to stdout instead of running ffmpeg"""
+    real_popen = subprocess.Popen
+    script = (
+        'import sys; sys.stdout.buffer.write(b"x" * %d); sys.stdout.flush(); sys.exit(%d)'
+        % (num_bytes, exit_code)
+    )
+
+    def popen(cmd, **kwargs):
+        return real_popen([sys.executable, '-c', script], **kwargs)
+
+    return popen
+
+
+def test_pipe_reader_fills_reads_and_tracks_position():
+    r, w = os.pipe()
+    with open(w, 'wb') as writer:
+        writer.write(b'abcdef')
+    with open(r, 'rb', buffering=0) as raw:
+        reader = app._PipeReader(raw)
+        assert reader.read(4) == b'abcd'
+        assert reader.tell() == 4
+        assert reader.read(4) == b'ef'
+        assert reader.tell() == 6
+        assert reader.read(4) == b''
+
+
+def test_transcode_and_upload_streams_pipe_in_chunks(monkeypatch, gcs_client, gcs_session):
+    size = 2 * 256 * 1024 + 123
+    monkeypatch.setattr(app.subprocess, 'Popen', _fake_ffmpeg(size))
+
+    blob = gcs_client.bucket('b').blob('audio/x.mp3')
+    blob.chunk_size = 256 * 1024
+    app.transcode_and_upload('/dev/null', blob)
+
+    assert len(gcs_session.received) == size
+    assert blob.size == size
+    assert gcs_session.calls == ['POST', 'PUT', 'PUT', 'PUT']
+
+
+def test_transcode_and_upload_retries_failed_chunk(monkeypatch):
+    session = FakeGCSSession(fail_puts={2})
+    gcs_client = make_gcs_client(session)
+    size = 2 * 256 * 1024 + 123
+    monkeypatch.setattr(app.subprocess, 'Popen', _fake_ffmpeg(size))
+
+    blob = gcs_client.bucket('b').blob('audio/x.mp3')
+    blob.chunk_size = 256 * 1024
+    app.transcode_and_upload('/dev/null', blob)
+
+    assert len(session.received) == size
+    assert session.calls == ['POST', 'PUT', 'PUT', 'PUT', 'PUT']
+
+
+def test_transcode_and_upload_deletes_blob_when_ffmpeg_fails(monkeypatch, gcs_client, gcs_session):
+    monkeypatch.setattr(app.subprocess, 'Popen', _fake_ffmpeg(1000, exit_code=3))
+
+    blob = gcs_client.bucket('b').blob('audio/x.mp3')
+    with pytest.raises(RuntimeError, match='Audio extraction failed'):
+        app.transcode_and_upload('/dev/null', blob)
+
+    assert gcs_session.calls[-1] == 'DELETE'
+
+
+def _write_cookie(path, value):
+    with open(path, 'w') as f:
+        f.write('# Netscape HTTP Cookie File\n')
+        f.write(f'.youtube.com\tTRUE\t/\tTRUE\t2147483647\tSID\t{value}\n')
+
+
+def _read_cookie(path):
+    with open(path) as f:
+        return f.read().rsplit('\t', 1)[-1].strip()
+
+
+@pytest.fixture
+def ydl_pools():
+    app.clear_ydl_pools()
+    yield
+    app.clear_ydl_pools()
+
+
+def test_borrow_ydl_reuses_idle_instance(ydl_pools):
+    with app._borrow_ydl({'quiet': True}) as first:
+        pass
+    with app._borrow_ydl({'quiet': True}) as second:
+        assert second is first
+        with app._borrow_ydl({'quiet': True}) as concurrent:
+            assert concurrent is not first
+
+
+def test_clear_ydl_pools_keeps_refreshed_cookies(ydl_pools, tmp_path):
+    cookies = tmp_path / 'cookies.txt'
+    _write_cookie(cookies, 'old')
+
+    with app._borrow_ydl({'quiet': True, 'cookiefile': str(cookies)}) as ydl:
+        assert len(ydl.cookiejar) == 1
+
+    # /refresh-cookies replaces the file, then clears the pools
+    _write_cookie(cookies, 'new')
+    app.clear_ydl_pools()
+
+    assert _read_cookie(cookies) == 'new'
+
+
+def test_clear_ydl_pools_does_not_recreate_deleted_cookies(ydl_pools, tmp_path):
+    cookies = tmp_path / 'cookies.txt'
+    _write_cookie(cookies, 'old')
+
+    with app._borrow_ydl({'quiet': True, 'cookiefile': str(cookies)}) as ydl:
+        assert len(ydl.cookiejar) == 1
+
+    cookies.unlink()
+    app.clear_ydl_pools()
+
+    assert not cookies.exists()
+
+
+def test_evicted_and_overflow_ydls_keep_cookies(ydl_pools, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, 'YDL_POOL_SIZE', 1)
+    cookies = tmp_path / 'cookies.txt'
+    _write_cookie(cookies, 'old')
+    opts = {'quiet': True, 'cookiefile': str(cookies)}
+
+    # Two concurrent borrows; the second one returned overflows the pool
+    with app._borrow_ydl(opts) as first, app._borrow_ydl(opts) as second:
+        assert len(first.cookiejar) == 1
+        assert len(second.cookiejar) == 1
+        _write_cookie(cookies, 'new')
+    assert _read_cookie(cookies) == 'new'
+
+    # Filling the LRU evicts the option set above
+    for i in range(app.YDL_POOL_KEYS):
+        with app._borrow_ydl({'quiet': True, 'socket_timeout': i}):
+            pass
+    assert len(app._YDL_POOLS) == app.YDL_POOL_KEYS
+    assert _read_cookie(cookies) == 'new'
+
+
+def test_run_job_records_failure_when_result_cannot_be_saved(monkeypatch):
+    saved = []
+
+    def save_job(job_id, record):
+        if record['status'] == 'done':
+            raise RuntimeError('GCS unavailable')
+        saved.append(record)
+
+    monkeypatch.setattr(app, 'save_job', save_job)
+    monkeypatch.setattr(app, '_download_one_safe', lambda url, check_existing=True: {'success': True})
+    app._INFLIGHT_JOBS['key'] = 'a' * 32
+
+    app._run_job('a' * 32, 'https://youtu.be/x', 'key')
+
+    assert [r['status'] for r in saved] == ['running', 'failed']
+    assert 'GCS unavailable' in saved[-1]['error']
+    assert 'key' not in app._INFLIGHT_JOBS
+
+
+def test_get_job_reports_stale_running_job_as_failed(monkeypatch):
+    job_id = 'b' * 32
+    records = {job_id: {'job_id': job_id, 'status': 'running', 'updated_at': 0}}
+    monkeypatch.setattr(app, 'load_job', records.get)
+    client = app.app.test_client()
+
+    response = client.get(f'/jobs/{job_id}')
+    assert response.status_code == 200
+    assert response.json['status'] == 'failed'
+
+    records[job_id]['updated_at'] = app.time.time()
+    response = client.get(f'/jobs/{job_id}')
+    assert response.status_code == 202
+    assert response.json['status'] == 'running'
+
+
+@pytest.mark.parametrize('path', ['/download', '/batch', '/info', '/formats'])
+@pytest.mark.parametrize('body', ['["https://youtu.be/abc"]', '"x"', 'not json'])
+def test_non_object_bodies_are_rejected(path, body):
+    client = app.app.test_client()
+    response = client.post(path, data=body, content_type='application/json')
+    assert response.status_code == 400
+
+
+def test_oversized_body_is_rejected():
+    client = app.app.test_client()
+    body = ' ' * (app.app.config['MAX_CONTENT_LENGTH'] + 1)
+    response = client.post('/batch', data=body, content_type='application/json')
+    assert response.status_code == 413
+
+
+def test_largest_valid_batch_fits_body_limit(monkeypatch):
+    monkeypatch.setattr(app, 'BUCKET_NAME', 'b')
+    monkeypatch.setattr(app, '_download_one_safe', lambda url: {'success': True})
+
+    # Characters outside the BMP escape to 12 bytes each
+    urls = ['https://' + '\U0001F600' * app.MAX_URL_LENGTH] * app.BATCH_MAX
+    assert all(app.is_valid_url(url) for url in urls)
+
+    client = app.app.test_client()
+    body = json.dumps({'urls': urls}, indent=4)
+    response = client.post('/batch', data=body, content_type='application/json')
+    assert response.status_code == 200